@@ -4,21 +4,21 @@
 KICKR BIKE SHIFT — BLE Simulator (GATT server with notifications)
 - Advertises the Wahoo service & characteristic UUIDs your client uses
 - GUI: 12 buttons + per-button Hold (tap vs. hold)
-- Keyboard driving: map keys to buttons (tap or hold semantics)
+- Keyboard driving: map keys to buttons (tap or hold semantics; simulator window must have focus)
 - Sends short-frame notifications: PP QQ RR (MSB of RR=press; lower 7 bits=sequence)
 """
 
 import asyncio
 import threading
-from collections import defaultdict
-from typing import Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Callable, Dict, Optional, Set
 
 import tkinter as tk
 from tkinter import ttk
 from tkinter.scrolledtext import ScrolledText
 
-from pynput import keyboard as pynput_keyboard
-
 # Bless: cross-platform BLE GATT server with notify/indicate support
 # pip install bless
 from bless import (
@@ -58,7 +58,12 @@ PREFIX_TO_BUTTON: Dict[str, str] = {
 }
 
 BUTTONS = list(PREFIX_TO_BUTTON.values())
+BUTTON_IDS = {n: i for i, n in enumerate(BUTTONS)}  # button name -> index into per-button arrays
 BUTTON_TO_PREFIX = {v: k for (k, v) in PREFIX_TO_BUTTON.items()}
+# Decoded [P, Q] bytes per button, so notifies don't re-parse the hex prefix
+BUTTON_TO_PREFIX_BYTES = {n: bytes.fromhex(p) for (n, p) in BUTTON_TO_PREFIX.items()}
+# One-byte R values, so a payload is a single concat of two immutable bytes
+_RR_BYTES = tuple(bytes((i,)) for i in range(256))
 
 # ----------------------------
 # Per-button behavior (default)
@@ -70,6 +75,10 @@ DEFAULT_BEHAVIOR = {
     "Left Steer":  "hold",
 }
 
+# Tap timing: auto-release delay, and window in which repeated taps are coalesced
+TAP_RELEASE_MS = 50
+TAP_COALESCE_S = 0.020
+
 # ----------------------------
 # Keyboard mappings for simulator control
 # keysym -> button name
@@ -91,23 +100,28 @@ KEY_TO_BUTTON = {
     "Q":     "Left Shift Down",
     "Return":"Left Brake",         # Enter
 }
-# To make matching easy across platforms and Tk keysyms:
+# Tk keysyms lowercased (e.g. "Return" -> "return", "I" with Shift -> "i"):
 NORM_KEYS = {k.lower(): v for k, v in KEY_TO_BUTTON.items()}
+KEYSYMS = frozenset(NORM_KEYS)  # fast membership gate for unrelated keys
+BUTTON_TO_KEYSYM = {v: k for k, v in NORM_KEYS.items()}  # for the "Key:" labels
 
 # ----------------------------
 # BLE simulator (server) in an asyncio loop running in a background thread
 # ----------------------------
 class WahooSimBLE:
-    def __init__(self, log_fn):
+    def __init__(self, log_fn, debug_enabled: Optional[Callable[[], bool]] = None):
         self.log = log_fn
+        # per-event [SIM] lines are only formatted when this returns True
+        self._dbg = debug_enabled or (lambda: True)
         self.loop: Optional[asyncio.AbstractEventLoop] = None
         self.server: Optional[BlessServer] = None
         self.char: Optional[BlessGATTCharacteristic] = None
         self._thread: Optional[threading.Thread] = None
-        self._stop_evt = threading.Event()
 
-        # per-prefix rolling sequence (7-bit), increment on press only
-        self.seq_by_prefix = defaultdict(int)
+        # per-button rolling sequence (7-bit), indexed by BUTTON_IDS; increment on press only
+        self.seq = bytearray(len(BUTTONS))
+        # buttons whose last notify was a press; only state changes are sent for hold buttons
+        self._held_buttons: Set[str] = set()
 
     # ----------- BLE notifier helpers -----------
     async def _start_server(self):
@@ -150,8 +164,9 @@ class WahooSimBLE:
             self.server = None
             self.char = None
 
-    async def _notify_payload(self, payload: bytes):
-        """Set the characteristic value then trigger a notify/indicate to subscribers."""
+    def _notify_sync(self, payload: bytes):
+        """Set the characteristic value then trigger a notify/indicate to subscribers.
+        Runs on the BLE loop thread (scheduled via call_soon_threadsafe)."""
         if not self.server or not self.char:
             return
         self.char.value = bytearray(payload)
@@ -162,59 +177,79 @@ class WahooSimBLE:
     def start(self):
         if self._thread and self._thread.is_alive():
             return
-        self._stop_evt.clear()
+        self._held_buttons.clear()
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
 
     def stop(self):
-        self._stop_evt.set()
-        if self.loop:
-            asyncio.run_coroutine_threadsafe(self._stop_server(), self.loop).result()
+        loop = self.loop
+        if loop and loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._stop_server(), loop).result(timeout=2.0)
+            except Exception as e:
+                self.log(f"[BLE] stop error: {e}")
+            # wake run_forever() in _run_loop so the thread can exit
+            loop.call_soon_threadsafe(loop.stop)
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=2.0)
 
     def _run_loop(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        # Python 3.12+: tasks that finish without awaiting run inline instead of being scheduled
+        if hasattr(asyncio, "eager_task_factory"):
+            self.loop.set_task_factory(asyncio.eager_task_factory)
+        # Any blocking backend work goes to one dedicated thread rather than the default pool
+        self.loop.set_default_executor(ThreadPoolExecutor(max_workers=1, thread_name_prefix="ble"))
         try:
             self.loop.run_until_complete(self._start_server())
-            # keep loop alive until stop requested
-            while not self._stop_evt.is_set():
-                self.loop.run_until_complete(asyncio.sleep(0.1))
+            # keep loop alive until stop() schedules loop.stop()
+            self.loop.run_forever()
         except Exception as e:
             self.log(f"[BLE] ERROR: {e}")
         finally:
             try:
                 self.loop.run_until_complete(self._stop_server())
+                self.loop.run_until_complete(self.loop.shutdown_default_executor())
             except Exception:
                 pass
             self.loop.close()
 
     # ----------- public API for the GUI -----------
-    def send_press(self, button_name: str):
-        prefix = BUTTON_TO_PREFIX.get(button_name)
-        if not prefix:
+    def send_press(self, button_name: str, hold: bool = False):
+        i = BUTTON_IDS.get(button_name)
+        if i is None:
             return
+        if hold and button_name in self._held_buttons:
+            return  # already held: don't queue duplicate presses
+        self._held_buttons.add(button_name)
         # increment sequence on press (wrap to 0..127)
-        seq = (self.seq_by_prefix[prefix] + 1) & 0x7F
-        self.seq_by_prefix[prefix] = seq
+        seq = (self.seq[i] + 1) & 0x7F
+        self.seq[i] = seq
         rr = 0x80 | seq  # MSB=1 => press
-        payload = bytes.fromhex(prefix) + bytes([rr])
-        self.log(f"[SIM] {button_name} press seq={seq} ({prefix}{rr:02X})")
-        if self.loop:
-            asyncio.run_coroutine_threadsafe(self._notify_payload(payload), self.loop)
+        payload = BUTTON_TO_PREFIX_BYTES[button_name] + _RR_BYTES[rr]  # immutable snapshot
+        if self._dbg():
+            self.log(f"[SIM] {button_name} press seq={seq} ({BUTTON_TO_PREFIX[button_name]}{rr:02X})")
+        loop = self.loop  # local copy: the loop thread may close it concurrently
+        if loop and not loop.is_closed():
+            loop.call_soon_threadsafe(self._notify_sync, payload)
 
     def send_release(self, button_name: str):
-        prefix = BUTTON_TO_PREFIX.get(button_name)
-        if not prefix:
+        i = BUTTON_IDS.get(button_name)
+        if i is None:
             return
+        if button_name not in self._held_buttons:
+            return  # nothing to release
+        self._held_buttons.discard(button_name)
         # reuse same sequence for release (MSB=0)
-        seq = self.seq_by_prefix[prefix] & 0x7F
+        seq = self.seq[i]
         rr = seq  # MSB=0 => release
-        payload = bytes.fromhex(prefix) + bytes([rr])
-        self.log(f"[SIM] {button_name} release seq={seq} ({prefix}{rr:02X})")
-        if self.loop:
-            asyncio.run_coroutine_threadsafe(self._notify_payload(payload), self.loop)
+        payload = BUTTON_TO_PREFIX_BYTES[button_name] + _RR_BYTES[rr]  # immutable snapshot
+        if self._dbg():
+            self.log(f"[SIM] {button_name} release seq={seq} ({BUTTON_TO_PREFIX[button_name]}{rr:02X})")
+        loop = self.loop  # local copy: the loop thread may close it concurrently
+        if loop and not loop.is_closed():
+            loop.call_soon_threadsafe(self._notify_sync, payload)
 
 # ----------------------------
 # GUI app
@@ -231,8 +266,10 @@ class WahooSimGUI:
 
         top = ttk.Frame(self.root)
         top.pack(fill="x", padx=6, pady=(6, 0))
-        btn_start = ttk.Button(top, text="Start Advertising", command=self.on_start)
-        btn_stop  = ttk.Button(top, text="Stop Advertising",  command=self.on_stop)
+        # takefocus=False throughout: a focused widget would also react to Space/Enter,
+        # which are mapped to buttons below
+        btn_start = ttk.Button(top, text="Start Advertising", command=self.on_start, takefocus=False)
+        btn_stop  = ttk.Button(top, text="Stop Advertising",  command=self.on_stop, takefocus=False)
         btn_start.pack(side="left", padx=(0, 6))
         btn_stop.pack(side="left")
         self.status.pack(side="right", padx=(6, 4), in_=top)
@@ -253,27 +290,31 @@ class WahooSimGUI:
         mid = ttk.Frame(self.root)
         mid.pack(fill="x", padx=6)
         self.debug_var = tk.BooleanVar(value=True)
-        dbg = ttk.Checkbutton(mid, text="Debug output", variable=self.debug_var)
+        dbg = ttk.Checkbutton(mid, text="Debug output", variable=self.debug_var, takefocus=False)
         dbg.pack(side="left")
 
         self.log.pack(fill="both", expand=True, padx=6, pady=6)
 
+        # Log lines are buffered and flushed to the widget once per tick
+        self._log_lines: deque = deque()
+        self._flush_log()
+
         # BLE
-        self.ble = WahooSimBLE(self.append_log)
+        self.ble = WahooSimBLE(self.append_log, debug_enabled=self.debug_var.get)
 
-        # Keyboard listener (global) — supports hold/tap
+        # Keyboard driving (Tk events on the UI thread while focused) — supports hold/tap
         self._held_keys = set()
-        self._kb_listener = pynput_keyboard.Listener(
-            on_press=self._on_key_press,
-            on_release=self._on_key_release
-        )
-        self._kb_listener.start()
+        # keysym -> after-id of a KeyRelease waiting to see if it's an X11 auto-repeat
+        self._release_after: Dict[str, str] = {}
+        self.root.bind_all("<KeyPress>", self._on_key_press)
+        self.root.bind_all("<KeyRelease>", self._on_key_release)
 
         # Window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Helpers
         self._pending_taps = {}  # button_name -> after-id for scheduled release
+        self._last_press_ts: Dict[str, float] = {}  # button_name -> monotonic time of last tap
 
         self._set_status("Idle", "gray")
 
@@ -284,13 +325,15 @@ class WahooSimGUI:
             frm = ttk.LabelFrame(row, text=name)
             frm.pack(side="left", padx=6, pady=3)
 
-            btn_press = ttk.Button(frm, text="Press", command=lambda n=name: self._button_press(n))
-            btn_rel   = ttk.Button(frm, text="Release", command=lambda n=name: self._button_release(n))
+            btn_press = ttk.Button(frm, text="Press", command=lambda n=name: self._button_press(n),
+                                   takefocus=False)
+            btn_rel   = ttk.Button(frm, text="Release", command=lambda n=name: self._button_release(n),
+                                   takefocus=False)
             btn_press.grid(row=0, column=0, padx=4, pady=4)
             btn_rel.grid(row=0, column=1, padx=4, pady=4)
 
             hold_var = tk.BooleanVar(value=(DEFAULT_BEHAVIOR.get(name, "tap") == "hold"))
-            chk_hold = ttk.Checkbutton(frm, text="Hold", variable=hold_var)
+            chk_hold = ttk.Checkbutton(frm, text="Hold", variable=hold_var, takefocus=False)
             chk_hold.grid(row=1, column=0, columnspan=2, padx=4, pady=2)
             self.behavior_by_btn[name] = hold_var
 
@@ -298,19 +341,27 @@ class WahooSimGUI:
             lab.grid(row=2, column=0, columnspan=2, padx=4, pady=2)
 
     def _key_for_button(self, name):
-        for k, v in NORM_KEYS.items():
-            if v == name:
-                return k
-        return "-"
+        return BUTTON_TO_KEYSYM.get(name, "-")
 
     # ---------- logging & status ----------
     def append_log(self, line: str):
-        if not self.debug_var.get() and line.startswith("[SIM] Other"):
-            return
-        self.log.configure(state="normal")
-        self.log.insert("end", line + "\n")
-        self.log.see("end")
-        self.log.configure(state="disabled")
+        # Called from the BLE loop thread too: only touch the deque here, never Tk
+        self._log_lines.append(line)
+
+    def _flush_log(self):
+        # One insert/see per tick instead of one per line (ScrolledText re-layout is costly)
+        lines = []
+        try:
+            while True:
+                lines.append(self._log_lines.popleft())
+        except IndexError:
+            pass
+        if lines:
+            self.log.configure(state="normal")
+            self.log.insert("end", "\n".join(lines) + "\n")
+            self.log.see("end")
+            self.log.configure(state="disabled")
+        self.root.after(100, self._flush_log)
 
     def _set_status(self, text: str, color: str):
         self.status.config(text=text)
@@ -330,12 +381,24 @@ class WahooSimGUI:
     # ---------- Button actions ----------
     def _button_press(self, name: str):
         if self.behavior_by_btn[name].get():  # hold
-            self.ble.send_press(name)
+            self.ble.send_press(name, hold=True)
         else:  # tap
-            self.ble.send_press(name)
-            # schedule release after a short delay (50 ms)
-            aid = self.root.after(50, lambda n=name: self._button_release(n))
-            self._pending_taps[name] = aid
+            self._tap(name)
+
+    def _tap(self, name: str):
+        # coalesce bursts: ignore a new tap within TAP_COALESCE_S of the previous one
+        now = time.monotonic()
+        if now - self._last_press_ts.get(name, 0.0) < TAP_COALESCE_S:
+            return
+        self._last_press_ts[name] = now
+        # keep at most one pending auto-release per button
+        prev = self._pending_taps.pop(name, None)
+        if prev:
+            self.root.after_cancel(prev)
+        self.ble.send_press(name)
+        # schedule release after a short delay
+        aid = self.root.after(TAP_RELEASE_MS, lambda n=name: self._button_release(n))
+        self._pending_taps[name] = aid
 
     def _button_release(self, name: str):
         # cancel any pending tap release (if user pressed Release manually)
@@ -345,45 +408,46 @@ class WahooSimGUI:
         self.ble.send_release(name)
 
     # ---------- Keyboard driving ----------
-    def _on_key_press(self, key):
+    def _on_key_press(self, event):
         try:
-            # normalize keysym
-            if hasattr(key, 'char') and key.char:
-                ksym = key.char.lower()
-            else:
-                # special keys (e.g., Key.space, Key.right)
-                ksym = str(key).split('.')[-1].lower()
-
+            ksym = event.keysym.lower()
+            if ksym not in KEYSYMS:
+                return
+            aid = self._release_after.pop(ksym, None)
+            if aid:
+                # X11 auto-repeat arrives as KeyRelease+KeyPress: the key never went up
+                self.root.after_cancel(aid)
+                return
             if ksym in self._held_keys:
                 return  # ignore auto-repeat
             self._held_keys.add(ksym)
 
-            btn = NORM_KEYS.get(ksym)
-            if not btn:
-                return
+            btn = NORM_KEYS[ksym]
 
             if self.behavior_by_btn[btn].get():  # hold
-                self.ble.send_press(btn)
+                self.ble.send_press(btn, hold=True)
             else:  # tap
-                self.ble.send_press(btn)
-                # schedule auto-release ~50 ms later
-                aid = self.root.after(50, lambda n=btn: self._button_release(n))
-                self._pending_taps[btn] = aid
+                self._tap(btn)
         except Exception as e:
             self.append_log(f"[SIM] KeyPress error: {e}")
 
-    def _on_key_release(self, key):
+    def _on_key_release(self, event):
         try:
-            if hasattr(key, 'char') and key.char:
-                ksym = key.char.lower()
-            else:
-                ksym = str(key).split('.')[-1].lower()
+            ksym = event.keysym.lower()
+            if ksym not in KEYSYMS:
+                return
+            # Defer until pending events are handled; a following KeyPress cancels it
+            if ksym not in self._release_after:
+                self._release_after[ksym] = self.root.after_idle(self._key_released, ksym)
+        except Exception as e:
+            self.append_log(f"[SIM] KeyRelease error: {e}")
 
+    def _key_released(self, ksym: str):
+        try:
+            self._release_after.pop(ksym, None)
             self._held_keys.discard(ksym)
 
-            btn = NORM_KEYS.get(ksym)
-            if not btn:
-                return
+            btn = NORM_KEYS[ksym]
 
             # only send release for hold-mode buttons
             if self.behavior_by_btn[btn].get():  # hold
@@ -13,8 +13,11 @@ install requirments
     pip install bleak pynput
 """
 import asyncio
+import signal
 import sys
-from typing import Dict, Tuple
+import threading
+from collections import deque
+from typing import Dict
 
 from bleak import BleakClient, BleakScanner  # BLE client/scan  (cross-platform)  # [1](https://bleak.readthedocs.io/en/latest/index.html)[2](https://bleak.readthedocs.io/en/latest/api/index.html)
 from pynput.keyboard import Controller, Key  # OS-level key injection (app-focused)  # [4](https://pythonhosted.org/pynput/keyboard.html)
@@ -41,6 +44,11 @@ PREFIX_TO_BUTTON: Dict[str, str] = {
     "0100": "Left Brake",
 }
 
+# Same table keyed by the 16-bit int (P << 8) | Q, for the per-notification lookup
+PREFIX_INT_TO_BUTTON: Dict[int, str] = {int(k, 16): v for k, v in PREFIX_TO_BUTTON.items()}
+# Stable index 0..N-1 per prefix, used to address the de-dup table
+PREFIX_INT_TO_IDX: Dict[int, int] = {p: i for i, p in enumerate(PREFIX_INT_TO_BUTTON)}
+
 # ---------- CONFIG: Which key to send for each button name ----------
 # Use printable characters (e.g., 'k', ' ') or names: 'ArrowUp','ArrowDown','ArrowLeft','ArrowRight','Enter','Space'
 BUTTON_TO_KEY: Dict[str, str] = {
@@ -85,91 +93,183 @@ _NAME_TO_SPECIAL = {
 
 _keyboard = Controller()
 
-def _send_key_tap(key_name: str) -> None:
-    """Tap a key using pynput (keydown+keyup)."""
-    if not key_name:
-        return
-    key = _NAME_TO_SPECIAL.get(key_name, key_name)  # fall back to literal (e.g., 'k')
-    _keyboard.press(key)
-    _keyboard.release(key)
+# Resolve each button's key once: pynput Key for special names, else the literal (e.g., 'k')
+BUTTON_TO_RESOLVED = {btn: _NAME_TO_SPECIAL.get(k, k) for btn, k in BUTTON_TO_KEY.items() if k}
+
+# ---------- Key injection worker ----------
+# OS key injection can block for milliseconds, so taps are handed to a daemon thread
+# and the BLE callback returns immediately. Bounded: if injection falls behind,
+# the oldest pending taps are dropped (latest input wins).
+KEY_QUEUE_MAX = 8
+_key_q: deque = deque(maxlen=KEY_QUEUE_MAX)
+_key_ready = threading.Event()
+
+def _key_worker() -> None:
+    while True:
+        _key_ready.wait()
+        _key_ready.clear()
+        while _key_q:
+            k = _key_q.popleft()
+            _keyboard.press(k)
+            _keyboard.release(k)
+
+def _start_key_worker() -> None:
+    threading.Thread(target=_key_worker, name="key-injector", daemon=True).start()
 
 # ---------- Short-frame parsing & de-dup ----------
 # Remember last processed sequence for (prefix, type) so we don't double-handle repeats.
-_last_seq: Dict[Tuple[str, str], int] = {}
+# Slot idx*2 = press, idx*2+1 = release; 0xFF never matches a 7-bit sequence.
+_last_seq = bytearray(b"\xff" * (2 * len(PREFIX_INT_TO_IDX)))
 
-def _handle_short_frame(payload: bytes):
+def _handle_short_frame(payload) -> None:
     """
-    Short frame is exactly 3 bytes: [P, Q, R]
-    - prefix = '%02X%02X' % (P, Q)
+    Short frame is exactly 3 bytes: [P, Q, R] (bytes or bytearray; only indexed)
+    - prefix = (P << 8) | Q  (hex string only built for the log line)
     - R: bit7=1=>press, 0=>release; low7=sequence
     """
     if len(payload) != 3:
         return  # ignore long frames
-    p, q, r = payload[0], payload[1], payload[2]
-    prefix = f"{p:02X}{q:02X}"
-    if prefix not in PREFIX_TO_BUTTON:
+    prefix = (payload[0] << 8) | payload[1]
+    button_name = PREFIX_INT_TO_BUTTON.get(prefix)
+    if button_name is None:
         return
+    r = payload[2]
 
     pressed = (r & 0x80) != 0
     seq = r & 0x7F
     ev_type = "press" if pressed else "release"
 
     # de-dup
-    key = (prefix, ev_type)
-    if _last_seq.get(key) == seq:
+    slot = PREFIX_INT_TO_IDX[prefix] * 2 + (0 if pressed else 1)
+    if _last_seq[slot] == seq:
         return
-    _last_seq[key] = seq
+    _last_seq[slot] = seq
 
-    button_name = PREFIX_TO_BUTTON[prefix]
     should_fire = pressed or (not TRIGGER_ON_PRESS_ONLY)
-    print(f"[BLE] {button_name} {ev_type} seq={seq} (prefix={prefix})")
+    print(f"[BLE] {button_name} {ev_type} seq={seq} (prefix={prefix:04X})")
 
     if should_fire:
-        key_name = BUTTON_TO_KEY.get(button_name)
-        if key_name:
-            _send_key_tap(key_name)
+        k = BUTTON_TO_RESOLVED.get(button_name)
+        if k is not None:
+            _key_q.append(k)
+            _key_ready.set()
 
 # ---------- BLE scanning, connection, notifications ----------
 async def _find_device_by_name_prefix(prefix: str, timeout: float = 10.0):
     print(f"Scanning for devices starting with '{prefix}' …")
-    devices = await BleakScanner.discover(timeout=timeout)
-    for d in devices:
-        if d.name and d.name.startswith(prefix):
-            print(f"Found: {d.name} ({d.address})")
-            return d
-    return None
+    # Stop at the first matching advertisement instead of waiting out the full timeout
+    found = asyncio.Event()
+    holder = {}
+
+    def _on_detect(d, _adv):
+        if "dev" not in holder and d.name and d.name.startswith(prefix):
+            holder["dev"] = d
+            found.set()
+
+    scanner = BleakScanner(detection_callback=_on_detect)
+    await scanner.start()
+    try:
+        await asyncio.wait_for(found.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await scanner.stop()
+
+    d = holder.get("dev")
+    if d:
+        print(f"Found: {d.name} ({d.address})")
+    return d
+
+def _request_low_latency(client: BleakClient):
+    """
+    Best-effort request for a short connection interval. Bleak has no portable API
+    for this; only the WinRT backend (Windows 11 SDK) exposes it. Silently skipped elsewhere.
+    Returns the WinRT request object (or None). The preference only lasts while that
+    object is alive, so keep it for the whole connection and close() it afterwards.
+    """
+    requester = getattr(getattr(client, "_backend", None), "_requester", None)
+    if requester is None or not hasattr(requester, "request_preferred_connection_parameters"):
+        return None
+    try:
+        try:
+            from winrt.windows.devices.bluetooth import (
+                BluetoothLEPreferredConnectionParameters,
+                BluetoothLEPreferredConnectionParametersRequestStatus,
+            )
+        except ImportError:
+            from bleak_winrt.windows.devices.bluetooth import (
+                BluetoothLEPreferredConnectionParameters,
+                BluetoothLEPreferredConnectionParametersRequestStatus,
+            )
+        request = requester.request_preferred_connection_parameters(
+            BluetoothLEPreferredConnectionParameters.throughput_optimized
+        )
+    except Exception as e:
+        print(f"Low-latency connection parameters not applied: {e}")
+        return None
+    if request.status == BluetoothLEPreferredConnectionParametersRequestStatus.SUCCESS:
+        print("Requested low-latency connection parameters.")
+    else:
+        print(f"Low-latency connection parameters not applied: status {request.status}")
+    return request
 
 def _notification_handler(_char, data: bytearray):
     # data is a bytearray; we only consume 3-byte short frames
-    _handle_short_frame(bytes(data))
+    _handle_short_frame(data)
 
 async def main():
+    _start_key_worker()
     NAME_PREFIX = "KICKR BIKE SHIFT"  # wildcard: accepts any suffix
     dev = await _find_device_by_name_prefix(NAME_PREFIX, timeout=12.0)
     if not dev:
         print("No matching device found. Ensure the bike is on and advertising.")
         return
 
-    async with BleakClient(dev) as client:
+    # use_cached_services: skip the GATT discovery round-trip on reconnect (WinRT; ignored elsewhere)
+    async with BleakClient(dev, winrt=dict(use_cached_services=True)) as client:
         if not client.is_connected:
             print("Failed to connect.")
             return
+        latency_request = _request_low_latency(client)
 
         print("Connected. Subscribing to notifications …")
         await client.start_notify(WAHOO_CHAR_UUID, _notification_handler)  # [3](https://github.com/hbldh/bleak/blob/develop/examples/enable_notifications.py)
         print("Listening. Press Ctrl+C to stop.")
+        # Idle without waking until Ctrl+C
+        stop_event = asyncio.Event()
         try:
-            while True:
-                await asyncio.sleep(1)
+            asyncio.get_running_loop().add_signal_handler(signal.SIGINT, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C cancels this task instead, and the finally still runs
+        try:
+            await stop_event.wait()
         except KeyboardInterrupt:
             pass
         finally:
-            await client.stop_notify(WAHOO_CHAR_UUID)
+            try:
+                await client.stop_notify(WAHOO_CHAR_UUID)
+            finally:
+                if latency_request is not None:
+                    try:
+                        latency_request.close()
+                    except Exception:
+                        pass
+
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+    loop = asyncio.new_event_loop()
+    # Python 3.12+: tasks that finish without awaiting run inline instead of being scheduled
+    if hasattr(asyncio, "eager_task_factory"):
+        loop.set_task_factory(asyncio.eager_task_factory)
+    return loop
 
 if __name__ == "__main__":
     # macOS: grant Terminal/Python Accessibility permission to allow key injection. [7](https://support.apple.com/guide/mac-help/allow-accessibility-apps-to-access-your-mac-mh43185/mac)
     try:
-        asyncio.run(main())
+        if hasattr(asyncio, "Runner"):  # Python 3.11+: same Ctrl+C handling as asyncio.run
+            with asyncio.Runner(loop_factory=_new_event_loop) as runner:
+                runner.run(main())
+        else:
+            asyncio.run(main())
     except RuntimeError:
         # For some environments (older Python/Windows event loop policy), fallback:
         loop = asyncio.get_event_loop()
@@ -13,8 +13,10 @@ import asyncio
 import threading
 import queue
 import sys
+import time
 import atexit
-from typing import Dict, Tuple, Optional
+from collections import deque
+from typing import Dict, List, Optional
 
 import tkinter as tk
 from tkinter import ttk
@@ -33,22 +35,22 @@ DEVICE_NAME_PREFIX = "KICKR BIKE SHIFT"  # wildcard: matches "KICKR BIKE SHIFT *
 WAHOO_SERVICE_UUID = "a026ee0d-0a7d-4ab3-97fa-f1500f9feb8b"
 WAHOO_CHAR_UUID    = "a026e03c-0a7d-4ab3-97fa-f1500f9feb8b"
 
-# Short-frame families (first 2 bytes). Last byte: MSB=press, low7=sequence.
-PREFIX_TO_BUTTON: Dict[str, str] = {
+# Short-frame families (first 2 bytes as a 16-bit int, P << 8 | Q). Last byte: MSB=press, low7=sequence.
+PREFIX_TO_BUTTON: Dict[int, str] = {
     # Right cluster
-    "0001": "Right Up",
-    "8000": "Right Down",
-    "0008": "Right Steer",
-    "0004": "Right Shift Up",
-    "0002": "Right Shift Down",
-    "4000": "Right Brake",
+    0x0001: "Right Up",
+    0x8000: "Right Down",
+    0x0008: "Right Steer",
+    0x0004: "Right Shift Up",
+    0x0002: "Right Shift Down",
+    0x4000: "Right Brake",
     # Left cluster
-    "0200": "Left Up",
-    "0400": "Left Down",
-    "2000": "Left Steer",
-    "1000": "Left Shift Up",
-    "0800": "Left Shift Down",
-    "0100": "Left Brake",
+    0x0200: "Left Up",
+    0x0400: "Left Down",
+    0x2000: "Left Steer",
+    0x1000: "Left Shift Up",
+    0x0800: "Left Shift Down",
+    0x0100: "Left Brake",
 }
 
 # Which key to send for each button (remove or set None to disable)
@@ -76,6 +78,15 @@ TRIGGER_ON_PRESS_ONLY = True
 # Scan timeout (seconds)
 SCAN_TIMEOUT_S = 12.0
 
+# Log frames that are not known short frames? Off by default; when on, at most one
+# line per UNKNOWN_LOG_INTERVAL_S (with a count of the frames suppressed in between).
+LOG_UNKNOWN_FRAMES = False
+UNKNOWN_LOG_INTERVAL_S = 0.5
+
+# GUI queue poll interval (ms): fast while messages are arriving, slower when idle
+DRAIN_BUSY_MS = 10
+DRAIN_IDLE_MS = 40
+
 # ----------------------------
 # Key injection helpers
 # ----------------------------
@@ -100,63 +111,177 @@ _NAME_TO_SPECIAL = {
     "PageDown": Key.page_down,
 }
 
-def send_key_tap(key_name: str):
-    """Tap a key using pynput (OS-level; goes to the foreground app)."""
-    if not key_name:
+# Button -> resolved pynput key (Key.* for special names, else the literal char); unmapped buttons omitted
+BUTTON_TO_KEYOBJ: Dict[str, object] = {
+    name: _NAME_TO_SPECIAL.get(k, k) for name, k in BUTTON_TO_KEY.items() if k
+}
+
+# Windows fast path: one SendInput call with prebuilt keydown+keyup INPUT structs per key,
+# skipping pynput's per-call dispatch. Keys it can't express (or other OSes) use pynput.
+_FAST_TAPS: Dict[object, object] = {}
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _user32 = ctypes.WinDLL("user32", use_last_error=True)
+    _user32.VkKeyScanW.argtypes = [wintypes.WCHAR]
+    _user32.VkKeyScanW.restype = ctypes.c_short
+    _user32.MapVirtualKeyW.argtypes = [wintypes.UINT, wintypes.UINT]
+    _user32.MapVirtualKeyW.restype = wintypes.UINT
+
+    _INPUT_KEYBOARD = 1
+    _KEYEVENTF_EXTENDEDKEY = 0x0001
+    _KEYEVENTF_KEYUP = 0x0002
+    _MAPVK_VK_TO_VSC = 0
+    # PageUp..Down arrows, Insert, Delete are "extended" keys
+    _EXTENDED_VKS = frozenset(range(0x21, 0x29)) | {0x2D, 0x2E}
+
+    class _MOUSEINPUT(ctypes.Structure):
+        _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG), ("mouseData", wintypes.DWORD),
+                    ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class _KEYBDINPUT(ctypes.Structure):
+        _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                    ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class _INPUTUNION(ctypes.Union):
+        # MOUSEINPUT is the largest member; it must be present for sizeof(INPUT) to be right
+        _fields_ = [("mi", _MOUSEINPUT), ("ki", _KEYBDINPUT)]
+
+    class _INPUT(ctypes.Structure):
+        _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+    _INPUT_SIZE = ctypes.sizeof(_INPUT)
+
+    def _vk_for(key_obj) -> Optional[int]:
+        if isinstance(key_obj, str):
+            if len(key_obj) != 1:
+                return None
+            res = _user32.VkKeyScanW(key_obj)
+            if res == -1 or (res >> 8) & 0xFF:
+                return None  # unmappable, or needs Shift/Ctrl/Alt
+            return res & 0xFF
+        return getattr(getattr(key_obj, "value", None), "vk", None)
+
+    def _build_tap(vk: int):
+        flags = _KEYEVENTF_EXTENDEDKEY if vk in _EXTENDED_VKS else 0
+        # Fill the scan code too, as pynput does; games/raw-input readers look at it
+        scan = _user32.MapVirtualKeyW(vk, _MAPVK_VK_TO_VSC)
+        arr = (_INPUT * 2)()
+        for inp, f in zip(arr, (flags, flags | _KEYEVENTF_KEYUP)):
+            inp.type = _INPUT_KEYBOARD
+            inp.u.ki = _KEYBDINPUT(vk, scan, f, 0, 0)
+        return arr
+
+    for _k in set(BUTTON_TO_KEYOBJ.values()):
+        _vk = _vk_for(_k)
+        if _vk:
+            _FAST_TAPS[_k] = _build_tap(_vk)
+
+def send_key_tap(key_obj):
+    """Tap an already-resolved key (OS-level; goes to the foreground app)."""
+    arr = _FAST_TAPS.get(key_obj)
+    if arr is not None:
+        _user32.SendInput(2, arr, _INPUT_SIZE)
         return
-    key_obj = _NAME_TO_SPECIAL.get(key_name, key_name)  # use literal if not special
     keyboard.press(key_obj)
     keyboard.release(key_obj)
 
+# OS key injection can block briefly (e.g. macOS Accessibility round-trips), so the
+# BLE callback only enqueues resolved key objects and this daemon thread taps them.
+_keyq: "queue.SimpleQueue" = queue.SimpleQueue()
+
+def _key_worker():
+    while True:
+        send_key_tap(_keyq.get())
+
+def start_key_worker():
+    threading.Thread(target=_key_worker, name="key-injector", daemon=True).start()
+
 # ----------------------------
 # BLE parser (short frames only)
 # ----------------------------
 
-# De-dup: remember last sequence handled per (prefix, type)
-_last_seq: Dict[Tuple[str, str], int] = {}
+# Dense ids 0..N-1 per known prefix, so per-frame state can live in flat lists
+PREFIX_TO_ID: Dict[int, int] = {p: i for i, p in enumerate(PREFIX_TO_BUTTON)}
+BUTTON_PREFIXES: List[int] = list(PREFIX_TO_BUTTON)        # id -> prefix
+BUTTON_NAMES: List[str] = list(PREFIX_TO_BUTTON.values())  # id -> name
+
+# Direct-mapped prefix -> id table over the whole 16-bit space (None = unknown prefix)
+PREFIX_TABLE: List[Optional[int]] = [None] * 0x10000
+for _p, _i in PREFIX_TO_ID.items():
+    PREFIX_TABLE[_p] = _i
+
+# id -> resolved pynput key (Key.* or literal char), or None if the button is unmapped
+KEY_FOR_PREFIX: List[Optional[object]] = [BUTTON_TO_KEYOBJ.get(n) for n in BUTTON_NAMES]
+
+# Dispatch specialized at import: event code (prefix_id << 1) | pressed -> key to tap or None.
+# Folds in TRIGGER_ON_PRESS_ONLY so the handler does a single index per event.
+KEY_FOR_CODE: List[Optional[object]] = [
+    KEY_FOR_PREFIX[code >> 1] if (code & 1 or not TRIGGER_ON_PRESS_ONLY) else None
+    for code in range(2 * len(PREFIX_TO_ID))
+]
+
+# parse_and_dedup() rejects
+NOT_SHORT_FRAME = -1
+DUPLICATE = -2
 
-def parse_short_frame(payload: bytes):
+def parse_and_dedup(payload, last_r: List[int]) -> int:
     """
-    Short frame is exactly 3 bytes [P, Q, R]
-    - prefix = '%02X%02X' % (P, Q)
+    Decode and de-dup a notification in one call.
+    De-dup: last_r[prefix_id] holds the last R byte seen for that button; R encodes
+    both press/release and sequence, so a repeat is a single byte compare.
+    Caller must pass exactly 3 bytes [P, Q, R] (bytes or bytearray; only indexed)
+    - prefix = (P << 8) | Q
     - R: bit7=1 => press, 0 => release; low7 => rolling sequence
-    Returns dict or None
+    Returns (prefix_id << 1) | pressed for a new event, else NOT_SHORT_FRAME or DUPLICATE.
     """
-    if len(payload) != 3:
-        return None
-    p, q, r = payload[0], payload[1], payload[2]
-    prefix = f"{p:02X}{q:02X}"
-    if prefix not in PREFIX_TO_BUTTON:
-        return None
-
-    pressed = (r & 0x80) != 0
-    seq = r & 0x7F
-    ev_type = "press" if pressed else "release"
-    return {
-        "prefix": prefix,
-        "name": PREFIX_TO_BUTTON[prefix],
-        "type": ev_type,
-        "seq": seq,
-        "rrHex": f"{r:02X}",
-    }
-
-def already_handled(prefix: str, ev_type: str, seq: int) -> bool:
-    key = (prefix, ev_type)
-    if _last_seq.get(key) == seq:
-        return True
-    _last_seq[key] = seq
-    return False
+    pid = PREFIX_TABLE[(payload[0] << 8) | payload[1]]
+    if pid is None:
+        return NOT_SHORT_FRAME
+    r = payload[2]
+    if last_r[pid] == r:
+        return DUPLICATE
+    last_r[pid] = r
+    return (pid << 1) | (r >> 7)
+
+class HotState:
+    """Everything notification_handler reads or writes per frame, in one slotted object."""
+    __slots__ = ("key_for_code", "last_r", "log_put", "key_put", "verbose")
+
+    def __init__(self, log_put, key_put):
+        self.key_for_code = KEY_FOR_CODE
+        # De-dup: last R byte per prefix_id. Starts at -1 (no R byte can equal it),
+        # so every button's first frame is handled.
+        self.last_r: List[int] = [-1] * len(PREFIX_TO_ID)
+        self.log_put = log_put
+        self.key_put = key_put
+        self.verbose: bool = True  # mirror of the Verbose checkbox (never read Tk vars off-thread)
 
 # ----------------------------
 # BLE scanning helper
 # ----------------------------
 
 async def find_device_by_prefix(prefix: str, timeout: float):
-    devices = await BleakScanner.discover(timeout=timeout)
-    for d in devices:
-        if d.name and d.name.startswith(prefix):
-            return d
-    return None
+    # Returns as soon as a matching advertisement is seen (None after timeout).
+    # The filter runs per advertisement; the length check rejects most names cheaply.
+    n = len(prefix)
+    return await BleakScanner.find_device_by_filter(
+        lambda d, _adv: d.name is not None and len(d.name) >= n and d.name.startswith(prefix),
+        timeout=timeout,
+    )
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop for the BLE thread: uvloop when installed (POSIX; faster callback dispatch),
+    otherwise asyncio's default (already the Proactor loop on Windows).
+    """
+    try:
+        import uvloop  # optional: pip install uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
 
 # ----------------------------
 # GUI App with robust cleanup
@@ -168,8 +293,8 @@ class BikeKeyGUI:
         self.root.title("KICKR BIKE SHIFT — Button → Key (Short-frames only)")
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
-        # Comm queue from BLE thread -> GUI
-        self.msgq: queue.Queue = queue.Queue()
+        # Comm queue from BLE thread -> GUI (single producer/consumer; deque append/popleft are atomic)
+        self.msgq: deque = deque()
         self.ble_thread: Optional[threading.Thread] = None
         self.stop_event = threading.Event()
 
@@ -177,8 +302,12 @@ class BikeKeyGUI:
         self.client: Optional[BleakClient] = None
         self._notify_on: bool = False  # track if start_notify succeeded
 
+        # Per-frame state for notification_handler
+        self._hot = HotState(self.msgq.append, _keyq.put)
+
         self._build_ui()
         self._drain_queue()  # start polling the message queue
+        start_key_worker()
 
         # Ensure best-effort cleanup on interpreter shutdown
         atexit.register(self._atexit_cleanup)
@@ -200,6 +329,15 @@ class BikeKeyGUI:
         self.lbl_status = ttk.Label(top, text="Idle")
         self.lbl_status.pack(side="right")
 
+        # Verbose checkbox (per-event log lines; uncheck for high-rate use)
+        mid = ttk.Frame(self.root)
+        mid.pack(fill="x", padx=6)
+        self.verbose_log = tk.BooleanVar(value=self._hot.verbose)
+        self.chk_verbose = ttk.Checkbutton(
+            mid, text="Verbose log", variable=self.verbose_log, command=self._on_verbose_toggle
+        )
+        self.chk_verbose.pack(side="left")
+
         # Debug log
         self.log = ScrolledText(self.root, height=22, width=100, state="disabled")
         self.log.pack(fill="both", expand=True, padx=6, pady=6)
@@ -211,6 +349,9 @@ class BikeKeyGUI:
         )
         hint.pack(padx=6, pady=(0, 8))
 
+    def _on_verbose_toggle(self):
+        self._hot.verbose = bool(self.verbose_log.get())
+
     def set_status(self, text: str, color: str = "gray"):
         self.lbl_status.config(text=text)
         self.dot.config(fg=color)
@@ -260,42 +401,62 @@ class BikeKeyGUI:
     # ---------- Background worker ----------
     def _ble_worker(self):
         try:
-            asyncio.run(self._ble_main())
+            if hasattr(asyncio, "Runner"):  # Python 3.11+
+                with asyncio.Runner(loop_factory=new_event_loop) as runner:
+                    runner.run(self._ble_main())
+            else:
+                asyncio.run(self._ble_main())
         except Exception as e:
-            self.msgq.put(("log", f"[BLE] Error: {e}"))
-            self.msgq.put(("status", ("Error", "red")))
-            self.msgq.put(("enable_connect", True))
+            self.msgq.append(("log", f"[BLE] Error: {e}"))
+            self.msgq.append(("status", ("Error", "red")))
+            self.msgq.append(("enable_connect", True))
 
     async def _ble_main(self):
         dev = await find_device_by_prefix(DEVICE_NAME_PREFIX, SCAN_TIMEOUT_S)
         if dev is None:
-            self.msgq.put(("log", "[BLE] Device not found. Is the bike on / advertising?"))
-            self.msgq.put(("status", ("Not found", "red")))
-            self.msgq.put(("enable_connect", True))
+            self.msgq.append(("log", "[BLE] Device not found. Is the bike on / advertising?"))
+            self.msgq.append(("status", ("Not found", "red")))
+            self.msgq.append(("enable_connect", True))
             return
 
-        self.msgq.put(("log", f"[BLE] Found {dev.name} ({dev.address}) — connecting…"))
+        self.msgq.append(("log", f"[BLE] Found {dev.name} ({dev.address}) — connecting…"))
         client: Optional[BleakClient] = None
         self._notify_on = False
 
-        async def notification_handler(_char, data: bytearray):
-            payload = bytes(data)
-            evt = parse_short_frame(payload)
-            if not evt:
-                # Log unknown frames for debugging; comment out if too chatty
-                self.msgq.put(("log", f"[BLE] Other frame: {payload.hex().upper()}"))
-                return
-            if already_handled(evt["prefix"], evt["type"], evt["seq"]):
-                return
+        # rate-limit state for the unknown-frame log
+        unknown_suppressed = 0
+        last_unknown_ts = 0.0
 
-            name, ev_type, seq, rr = evt["name"], evt["type"], evt["seq"], evt["rrHex"]
-            self.msgq.put(("log", f"[BLE] {name} {ev_type} seq={seq} ({evt['prefix']}{rr})"))
+        hs = self._hot  # single closure cell; all per-frame state hangs off it
 
-            if TRIGGER_ON_PRESS_ONLY and ev_type != "press":
+        async def notification_handler(_char, data: bytearray):
+            nonlocal unknown_suppressed, last_unknown_ts
+            # long frames are the bulk of the traffic: reject them before any other work
+            code = parse_and_dedup(data, hs.last_r) if len(data) == 3 else NOT_SHORT_FRAME
+            if code < 0:
+                if code == DUPLICATE or not LOG_UNKNOWN_FRAMES:
+                    return
+                now = time.monotonic()
+                if now - last_unknown_ts < UNKNOWN_LOG_INTERVAL_S:
+                    unknown_suppressed += 1
+                    return
+                last_unknown_ts = now
+                extra = f" (+{unknown_suppressed} suppressed)" if unknown_suppressed else ""
+                unknown_suppressed = 0
+                hs.log_put(("log", f"[BLE] Other frame: {data.hex().upper()}{extra}"))
                 return
-            key_name = BUTTON_TO_KEY.get(name)
-            if key_name:
-                send_key_tap(key_name)
+            if hs.verbose:
+                pid, pressed = code >> 1, code & 1
+                rr = data[2]
+                name, prefix = BUTTON_NAMES[pid], BUTTON_PREFIXES[pid]
+                # hex formatting only happens here, for the log line
+                ev_type = "press" if pressed else "release"
+                seq = rr & 0x7F
+                hs.log_put(("log", f"[BLE] {name} {ev_type} seq={seq} ({prefix:04X}{rr:02X})"))
+
+            k = hs.key_for_code[code]
+            if k is not None:
+                hs.key_put(k)
 
         try:
             client = BleakClient(dev)
@@ -303,21 +464,21 @@ class BikeKeyGUI:
             self.client = client
 
             if not client.is_connected:
-                self.msgq.put(("log", "[BLE] Failed to connect."))
-                self.msgq.put(("status", ("Error", "red")))
-                self.msgq.put(("enable_connect", True))
+                self.msgq.append(("log", "[BLE] Failed to connect."))
+                self.msgq.append(("status", ("Error", "red")))
+                self.msgq.append(("enable_connect", True))
                 return
 
-            self.msgq.put(("log", "[BLE] Connected. Subscribing to notifications…"))
+            self.msgq.append(("log", "[BLE] Connected. Subscribing to notifications…"))
             await client.start_notify(WAHOO_CHAR_UUID, notification_handler)
             self._notify_on = True
 
-            self.msgq.put(("status", ("Connected", "green")))
-            self.msgq.put(("log", "[BLE] Listening (short-frames only)."))
+            self.msgq.append(("status", ("Connected", "green")))
+            self.msgq.append(("log", "[BLE] Listening (short-frames only)."))
 
-            # Run until requested to stop
-            while not self.stop_event.is_set():
-                await asyncio.sleep(0.1)
+            # Run until requested to stop: block an executor thread on the threading.Event
+            # so the loop stays idle and wakes as soon as Disconnect is clicked
+            await asyncio.get_running_loop().run_in_executor(None, self.stop_event.wait)
 
         finally:
             # Robust cleanup — ALWAYS attempt to stop notifications and disconnect
@@ -326,28 +487,31 @@ class BikeKeyGUI:
                     if self._notify_on:
                         try:
                             await client.stop_notify(WAHOO_CHAR_UUID)
-                            self.msgq.put(("log", "[BLE] Notifications stopped."))
+                            self.msgq.append(("log", "[BLE] Notifications stopped."))
                         except Exception as e:
-                            self.msgq.put(("log", f"[BLE] stop_notify error: {e}"))
+                            self.msgq.append(("log", f"[BLE] stop_notify error: {e}"))
                     if client.is_connected:
                         try:
                             await client.disconnect()
-                            self.msgq.put(("log", "[BLE] Disconnected from device."))
+                            self.msgq.append(("log", "[BLE] Disconnected from device."))
                         except Exception as e:
-                            self.msgq.put(("log", f"[BLE] disconnect error: {e}"))
+                            self.msgq.append(("log", f"[BLE] disconnect error: {e}"))
             finally:
                 self.client = None
                 self._notify_on = False
-                self.msgq.put(("status", ("Disconnected", "gray")))
-                self.msgq.put(("enable_connect", True))
+                self.msgq.append(("status", ("Disconnected", "gray")))
+                self.msgq.append(("enable_connect", True))
 
     # ---------- UI queue pump ----------
     def _drain_queue(self):
+        logs = []
+        drained = 0
         try:
             while True:
-                kind, payload = self.msgq.get_nowait()
+                kind, payload = self.msgq.popleft()
+                drained += 1
                 if kind == "log":
-                    self.append_log(payload)
+                    logs.append(payload)
                 elif kind == "status":
                     text, color = payload
                     self.set_status(text, color)
@@ -355,10 +519,13 @@ class BikeKeyGUI:
                     self.btn_connect.config(state="normal" if payload else "disabled")
                     # Disconnect stays enabled so user can click again; it just sets stop_event
                     self.btn_disconnect.config(state="normal")
-        except queue.Empty:
+        except IndexError:
             pass
-        # poll again
-        self.root.after(80, self._drain_queue)
+        if logs:
+            # one bulk insert; the Text widget is slow per insert, fast per bulk insert
+            self.append_log("\n".join(logs))
+        # poll again (adaptive)
+        self.root.after(DRAIN_BUSY_MS if drained else DRAIN_IDLE_MS, self._drain_queue)
 
     # ---------- Main loop ----------
     def run(self):
@@ -4,7 +4,7 @@
 KICKR BIKE SHIFT — GUI (short-frames only)
 - Connect / Disconnect buttons
 - Status indicator
-- Debug checkbox (show/hide "other frames")
+- Debug checkbox (show/hide decoded and "other frames")
 - Short-frame-only decoding
 - Per-button behavior: Tap on press OR Hold until release
 - Auto-reconnect if device drops (unless user clicked Disconnect)
@@ -14,11 +14,14 @@ Keyboard injection backend: pydirectinput (replacing pynput)
 """
 
 import asyncio
+import concurrent.futures
+import functools
+import random
 import threading
-import queue
 import sys
 import atexit
-from typing import Dict, Tuple, Optional
+from collections import deque
+from typing import Callable, Dict, Tuple, Optional
 
 import tkinter as tk
 from tkinter import ttk
@@ -93,8 +96,24 @@ BUTTON_BEHAVIOR: Dict[str, str] = {
 # Scan timeout (seconds)
 SCAN_TIMEOUT_S = 12.0
 
-# Reconnect wait between attempts (seconds)
+# Connect timeout when reusing the last known address instead of scanning (seconds)
+KNOWN_ADDR_CONNECT_TIMEOUT_S = 5.0
+
+# Reconnect wait between attempts (seconds): full-jitter exponential backoff,
+# uniform(0, min(MAX, BASE * 2**attempt)), reset once notifications are flowing
 RECONNECT_DELAY_S = 1.5
+RECONNECT_MAX_DELAY_S = 30.0
+
+# Keep at most this many lines in the log window
+LOG_MAX_LINES = 5000
+
+# GUI queue poll interval (ms): fast while messages flow, doubling up to the idle cap when quiet
+DRAIN_BUSY_MS = 10
+DRAIN_IDLE_MAX_MS = 250
+
+# Max "log" messages waiting in the BLE -> GUI queue; newer log lines are dropped beyond this.
+# Status/enable messages are never dropped.
+MSGQ_MAX = 2000
 
 # ----------------------------
 # Key name mapping to pydirectinput
@@ -131,97 +150,190 @@ def _to_pydi_key(key_name: str) -> Optional[str]:
     # Note: keep case for letters; pydirectinput is case-insensitive for alpha keys.
     return key_name
 
-def send_key_tap(key_name: str):
-    """Tap a key (keydown+keyup) via pydirectinput."""
-    k = _to_pydi_key(key_name)
-    if not k:
-        return
-    pydirectinput.press(k)
+# Resolved once at startup: button name -> pydirectinput key string (None = disabled)
+BUTTON_TO_PYDI_KEY: Dict[str, Optional[str]] = {
+    name: _to_pydi_key(key_name) for name, key_name in BUTTON_TO_KEY.items()
+}
 
-def send_key_down(key_name: str):
-    """Press and hold a key (no release) via pydirectinput."""
-    k = _to_pydi_key(key_name)
-    if not k:
+# Fast path: prebuilt scancode INPUT arrays per key, handed straight to SendInput.
+# Skips pydirectinput's per-call pause/failsafe/lookup work; same scancodes it would send.
+_TAP_INPUTS: Dict[str, object] = {}   # key -> INPUT[2] (down, up)
+_DOWN_INPUTS: Dict[str, object] = {}  # key -> INPUT[1]
+_UP_INPUTS: Dict[str, object] = {}    # key -> INPUT[1]
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _user32 = ctypes.WinDLL("user32", use_last_error=True)
+
+    _INPUT_KEYBOARD = 1
+    _KEYEVENTF_EXTENDEDKEY = 0x0001
+    _KEYEVENTF_KEYUP = 0x0002
+    _KEYEVENTF_SCANCODE = 0x0008
+
+    class _MOUSEINPUT(ctypes.Structure):
+        _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG), ("mouseData", wintypes.DWORD),
+                    ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class _KEYBDINPUT(ctypes.Structure):
+        _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                    ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+    class _INPUTUNION(ctypes.Union):
+        # MOUSEINPUT is the largest member; it must be present for sizeof(INPUT) to be right
+        _fields_ = [("mi", _MOUSEINPUT), ("ki", _KEYBDINPUT)]
+
+    class _INPUT(ctypes.Structure):
+        _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+    _INPUT_SIZE = ctypes.sizeof(_INPUT)
+
+    def _build_inputs(sc: int, *up_flags: bool):
+        flags = _KEYEVENTF_SCANCODE
+        if sc > 0x7F:
+            # DirectInput codes >= 0x80 are E0-prefixed (extended) keys, e.g. arrows
+            flags |= _KEYEVENTF_EXTENDEDKEY
+            sc &= 0x7F
+        arr = (_INPUT * len(up_flags))()
+        for inp, up in zip(arr, up_flags):
+            inp.type = _INPUT_KEYBOARD
+            inp.u.ki = _KEYBDINPUT(0, sc, flags | (_KEYEVENTF_KEYUP if up else 0), 0, 0)
+        return arr
+
+    for _k in set(BUTTON_TO_PYDI_KEY.values()):
+        _sc = pydirectinput.KEYBOARD_MAPPING.get(_k) if _k else None
+        if _sc:
+            _TAP_INPUTS[_k] = _build_inputs(_sc, False, True)
+            _DOWN_INPUTS[_k] = _build_inputs(_sc, False)
+            _UP_INPUTS[_k] = _build_inputs(_sc, True)
+
+# The send_* helpers take already-resolved pydirectinput key strings.
+def send_key_tap(key: str):
+    """Tap a key (keydown+keyup) via SendInput, else pydirectinput."""
+    arr = _TAP_INPUTS.get(key)
+    if arr is not None:
+        _user32.SendInput(2, arr, _INPUT_SIZE)
         return
-    pydirectinput.keyDown(k)
+    pydirectinput.press(key)
 
-def send_key_up(key_name: str):
-    """Release a previously held key via pydirectinput."""
-    k = _to_pydi_key(key_name)
-    if not k:
+def send_key_down(key: str):
+    """Press and hold a key (no release) via SendInput, else pydirectinput."""
+    arr = _DOWN_INPUTS.get(key)
+    if arr is not None:
+        _user32.SendInput(1, arr, _INPUT_SIZE)
         return
-    pydirectinput.keyUp(k)
+    pydirectinput.keyDown(key)
 
-# Track currently held keys per button to prevent duplicates and to clean up on disconnect.
-_HELD_BY_BUTTON: Dict[str, str] = {}  # button_name -> key_name
-
-def hold_if_needed(button_name: str, key_name: str):
-    if button_name not in _HELD_BY_BUTTON:
-        send_key_down(key_name)
-        _HELD_BY_BUTTON[button_name] = key_name
-
-def release_if_held(button_name: str):
-    key_name = _HELD_BY_BUTTON.pop(button_name, None)
-    if key_name:
-        send_key_up(key_name)
-
-def release_all_held_keys():
-    for btn, key_name in list(_HELD_BY_BUTTON.items()):
+def send_key_up(key: str):
+    """Release a previously held key via SendInput, else pydirectinput."""
+    arr = _UP_INPUTS.get(key)
+    if arr is not None:
+        _user32.SendInput(1, arr, _INPUT_SIZE)
+        return
+    pydirectinput.keyUp(key)
+
+# 'held' is the caller's button_name -> pydirectinput key map of currently held keys;
+# it prevents duplicate keydowns and lets us clean up on disconnect.
+def hold_if_needed(held: Dict[str, str], button_name: str, key: str):
+    if button_name not in held:
+        send_key_down(key)
+        held[button_name] = key
+
+def release_if_held(held: Dict[str, str], button_name: str):
+    key = held.pop(button_name, None)
+    if key:
+        send_key_up(key)
+
+def release_all_held_keys(held: Dict[str, str]):
+    keys = list(held.values())
+    held.clear()
+    # Keys with prebuilt INPUTs are released together in one SendInput call
+    fast = [_UP_INPUTS[k][0] for k in keys if k in _UP_INPUTS]
+    if fast:
         try:
-            send_key_up(key_name)
+            _user32.SendInput(len(fast), (_INPUT * len(fast))(*fast), _INPUT_SIZE)
         except Exception:
             pass
-        _HELD_BY_BUTTON.pop(btn, None)
+    for key in keys:
+        if key not in _UP_INPUTS:
+            try:
+                send_key_up(key)
+            except Exception:
+                pass
 
 # ----------------------------
 # BLE parser (short frames only)
 # ----------------------------
+# Short frame is exactly 3 bytes [P, Q, R]
+# - prefix = (P << 8) | Q, shown as '%02X%02X' % (P, Q)
+# - R: bit7=1 => press, 0 => release; low7 => rolling sequence
+# Decoding is done inline in the notification handler (see _ble_main).
 
-# De-dup: remember last sequence handled per (prefix, type)
-_last_seq: Dict[Tuple[str, str], int] = {}
+# Hot-path lookups: 16-bit prefix (P<<8)|Q -> button, and byte -> 2-char hex
+PREFIX_INT_TO_BUTTON: Dict[int, str] = {int(k, 16): v for k, v in PREFIX_TO_BUTTON.items()}
+_HEX = [f"{i:02X}" for i in range(256)]
 
-def parse_short_frame(payload: bytes):
+# Stable small-int id per button, so de-dup state can live in flat arrays
+BUTTON_ID: Dict[int, int] = {pq: i for i, pq in enumerate(PREFIX_INT_TO_BUTTON)}
+BUTTON_NAMES = list(PREFIX_INT_TO_BUTTON.values())
+
+def _noop():
+    pass
+
+# Config frozen per button id: (name, pydirectinput key or None, behavior)
+BUTTONS: Tuple[Tuple[str, Optional[str], str], ...] = tuple(
+    (name, BUTTON_TO_PYDI_KEY.get(name), BUTTON_BEHAVIOR.get(name, "tap")) for name in BUTTON_NAMES
+)
+
+# Field positions in the records returned by build_button_records
+REC_NAME, REC_KEY, REC_BEHAVIOR, REC_PRESS, REC_RELEASE = range(5)
+
+def build_button_records(held: Dict[str, str]) -> Tuple[Tuple[str, Optional[str], str, Callable, Callable], ...]:
     """
-    Short frame is exactly 3 bytes [P, Q, R]
-    - prefix = '%02X%02X' % (P, Q)
-    - R: bit7=1 => press, 0 => release; low7 => rolling sequence
-    Returns dict or None
+    Extend each BUTTONS entry with ready-to-call press/release thunks, indexed by button id.
+    'held' is the held-key map the hold thunks share.
     """
-    if len(payload) != 3:
-        return None
-    p, q, r = payload[0], payload[1], payload[2]
-    prefix = f"{p:02X}{q:02X}"
-    if prefix not in PREFIX_TO_BUTTON:
-        return None
-
-    pressed = (r & 0x80) != 0
-    seq = r & 0x7F
-    ev_type = "press" if pressed else "release"
-    return {
-        "prefix": prefix,
-        "name":   PREFIX_TO_BUTTON[prefix],
-        "type":   ev_type,
-        "seq":    seq,
-        "rrHex":  f"{r:02X}",
-    }
-
-def already_handled(prefix: str, ev_type: str, seq: int) -> bool:
-    key = (prefix, ev_type)
-    if _last_seq.get(key) == seq:
-        return True
-    _last_seq[key] = seq
-    return False
+    records = []
+    for name, key, behavior in BUTTONS:
+        if not key:
+            press, release = _noop, _noop
+        elif behavior == "hold":
+            press = functools.partial(hold_if_needed, held, name, key)
+            release = functools.partial(release_if_held, held, name)
+        else:  # "tap": taps ignore release
+            press, release = functools.partial(send_key_tap, key), _noop
+        records.append((name, key, behavior, press, release))
+    return tuple(records)
+
+def reconnect_delay(attempt: int) -> float:
+    """Full-jitter backoff delay for the given 1-based retry attempt."""
+    return random.uniform(0.0, min(RECONNECT_MAX_DELAY_S, RECONNECT_DELAY_S * (2 ** min(attempt - 1, 6))))
 
 # ----------------------------
 # BLE scanning helper
 # ----------------------------
 
 async def find_device_by_prefix(prefix: str, timeout: float):
-    devices = await BleakScanner.discover(timeout=timeout)
-    for d in devices:
-        if d.name and d.name.startswith(prefix):
-            return d
-    return None
+    # Stop at the first matching advertisement instead of waiting out the full timeout
+    found = asyncio.Event()
+    holder = {}
+
+    def _on_detect(d, _adv):
+        if "dev" not in holder and d.name and d.name.startswith(prefix):
+            holder["dev"] = d
+            found.set()
+
+    # Active scanning so the name (often only in the scan response) arrives quickly
+    scanner = BleakScanner(detection_callback=_on_detect, scanning_mode="active")
+    await scanner.start()
+    try:
+        await asyncio.wait_for(found.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await scanner.stop()
+    return holder.get("dev")
 
 # ----------------------------
 # GUI App with auto-reconnect & robust cleanup
@@ -233,17 +345,42 @@ class BikeKeyGUI:
         self.root.title("KICKR BIKE SHIFT — Button → Key (Short-frames only)")
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
-        # Comm queue from BLE thread -> GUI
-        self.msgq: queue.Queue = queue.Queue()
+        # Comm queue from BLE thread -> GUI (SPSC: append/popleft are atomic, no lock needed)
+        self.msgq: deque = deque()
+        # Log backlog accounting. Each counter only ever grows and has a single writer thread,
+        # so no lock is needed: BLE thread writes _logs_posted/_logs_dropped, Tk thread the rest.
+        self._logs_posted: int = 0
+        self._logs_dropped: int = 0
+        self._logs_drained: int = 0
+        self._logs_dropped_seen: int = 0
+        # One BLE thread + event loop, started on first Connect and reused for every session
         self.ble_thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[concurrent.futures.Future] = None  # current _ble_session run
+        self._session_idle = threading.Event()  # cleared by Connect, set when _ble_session ends
+        self._session_idle.set()
         self.stop_event = threading.Event()
+        # (loop, asyncio.Event) of the running BLE session, so stop requests wake it directly
+        self._stop_wakeup: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = None
 
         # BLE client handle & state
         self.client: Optional[BleakClient] = None
         self._notify_on: bool = False  # track if start_notify succeeded
+        self._known_addr: Optional[str] = None  # last address we connected to; skips the scan
+
+        # De-dup: last sequence handled per button id, split by press/release (0xFF = none yet)
+        self._last_seq_press = bytearray(b"\xff" * len(BUTTON_ID))
+        self._last_seq_release = bytearray(b"\xff" * len(BUTTON_ID))
+        # Currently held keys: button_name -> pydirectinput key
+        self._held: Dict[str, str] = {}
+        self._buttons = build_button_records(self._held)
+
+        # Current queue poll interval; only the Tk thread touches it
+        self._drain_delay_ms: int = DRAIN_BUSY_MS
 
         self._build_ui()
-        self._drain_queue()  # start polling the message queue
+        # The Tk thread polls the queue itself; the BLE thread never calls into Tk
+        self._drain_queue()
 
         # Ensure best-effort cleanup on interpreter shutdown
         atexit.register(self._atexit_cleanup)
@@ -269,7 +406,9 @@ class BikeKeyGUI:
         mid = ttk.Frame(self.root)
         mid.pack(fill="x", padx=6)
         self.debug_var = tk.BooleanVar(value=False)
-        self.chk_debug = ttk.Checkbutton(mid, text="Debug output", variable=self.debug_var)
+        self._debug: bool = False  # plain mirror of debug_var, safe to read from the BLE thread
+        self.chk_debug = ttk.Checkbutton(mid, text="Debug output", variable=self.debug_var,
+                                         command=self._on_debug_toggle)
         self.chk_debug.pack(side="left")
 
         # Debug log
@@ -283,6 +422,9 @@ class BikeKeyGUI:
         )
         hint.pack(padx=6, pady=(0, 8))
 
+    def _on_debug_toggle(self):
+        self._debug = bool(self.debug_var.get())
+
     def set_status(self, text: str, color: str = "gray"):
         self.lbl_status.config(text=text)
         self.dot.config(fg=color)
@@ -295,7 +437,7 @@ class BikeKeyGUI:
 
     # ---------- Button handlers ----------
     def on_connect_clicked(self):
-        if self.ble_thread and self.ble_thread.is_alive():
+        if not self._session_idle.is_set():
             return  # already running
         self.stop_event.clear()
         self.set_status("Scanning…", "orange")
@@ -303,12 +445,22 @@ class BikeKeyGUI:
         self.btn_connect.config(state="disabled")
         self.btn_disconnect.config(state="normal")
 
-        self.ble_thread = threading.Thread(target=self._ble_worker, daemon=True)
-        self.ble_thread.start()
+        self._session_idle.clear()
+        self._session = asyncio.run_coroutine_threadsafe(self._ble_session(), self._ensure_ble_loop())
 
     def on_disconnect_clicked(self):
         self.append_log("[UI] Disconnect requested.")
+        self._request_stop()
+
+    def _request_stop(self):
         self.stop_event.set()
+        wakeup = self._stop_wakeup
+        if wakeup:
+            loop, evt = wakeup
+            try:
+                loop.call_soon_threadsafe(evt.set)
+            except RuntimeError:
+                pass  # loop already closed; the session is over
 
     # ---------- Window close & atexit ----------
     def on_close(self):
@@ -322,46 +474,90 @@ class BikeKeyGUI:
 
     def _graceful_shutdown(self):
         try:
-            self.stop_event.set()
-            if self.ble_thread and self.ble_thread.is_alive():
-                self.append_log("[UI] Waiting for BLE thread to stop…")
-                self.ble_thread.join(timeout=5.0)
+            self._request_stop()
+            if not self._session_idle.is_set():
+                self.append_log("[UI] Waiting for BLE session to stop…")
+                if not self._session_idle.wait(timeout=5.0):
+                    # Stuck (e.g. in connect): cancel the task and let its cleanup unwind
+                    self._session.cancel()
+                    self._session_idle.wait(timeout=2.0)
+            loop, self._loop = self._loop, None
+            # Only stop the loop once the session is gone; closing it under a pending
+            # task would drop its cleanup. Otherwise the daemon thread dies with the process.
+            if loop is not None and self._session_idle.is_set():
+                try:
+                    loop.call_soon_threadsafe(loop.stop)
+                except RuntimeError:
+                    pass  # already closed
+                self.ble_thread.join(timeout=2.0)
         finally:
             # Always release any held keys on shutdown
-            release_all_held_keys()
+            release_all_held_keys(self._held)
 
     # ---------- Background worker ----------
-    def _ble_worker(self):
+    def _ensure_ble_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            self.ble_thread = threading.Thread(target=self._ble_worker, args=(loop,), daemon=True)
+            self.ble_thread.start()
+            self._loop = loop
+        return self._loop
+
+    def _ble_worker(self, loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()  # sessions are submitted with run_coroutine_threadsafe
+        finally:
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+
+    async def _ble_session(self):
+        # Stop requests from the UI thread set this asyncio.Event via call_soon_threadsafe,
+        # so waits below wake immediately instead of polling stop_event
+        stop_evt = asyncio.Event()
+        self._stop_wakeup = (asyncio.get_running_loop(), stop_evt)
+        if self.stop_event.is_set():
+            stop_evt.set()  # stop was requested before the wakeup was published
+        stop_wait = asyncio.ensure_future(stop_evt.wait())
         try:
-            asyncio.run(self._ble_main())
+            await self._ble_main(stop_wait)
         except Exception as e:
-            self.msgq.put(("log", f"[BLE] Error: {e}"))
-            self.msgq.put(("status", ("Error", "red")))
-            self.msgq.put(("enable_connect", True))
+            self._post(("log", f"[BLE] Error: {e}"))
+            self._post(("status", ("Error", "red")))
+        finally:
+            self._stop_wakeup = None
+            stop_wait.cancel()
+            # Mark idle before re-enabling Connect, so a click on it is never ignored
+            self._session_idle.set()
+            self._post(("enable_connect", True))
 
-    async def _ble_main(self):
+    async def _ble_main(self, stop_wait: asyncio.Future):
         """
         Auto-reconnect loop:
-        - find device
+        - find device (or reuse the last known address)
         - connect, subscribe, listen until disconnected or user pressed Disconnect
         - cleanup
         - if user did not press Disconnect, wait and try again
         """
         dev = None
+        attempt = 0  # consecutive failed/dropped connections
 
         while not self.stop_event.is_set():
-            # Find or refind device
-            if dev is None:
-                self.set_status("Scanning…", "orange")
-                self.msgq.put(("log", "[BLE] Scanning..."))
+            # Find or refind device; 'dev' is a BLEDevice from a scan or a bare address string
+            if dev is None and self._known_addr:
+                dev = self._known_addr
+                self._post(("log", f"[BLE] Connecting to known address {dev}…"))
+            elif dev is None:
+                self._post(("status", ("Scanning…", "orange")))
+                self._post(("log", "[BLE] Scanning..."))
                 dev = await find_device_by_prefix(DEVICE_NAME_PREFIX, SCAN_TIMEOUT_S)
                 if dev is None:
-                    self.msgq.put(("log", "[BLE] Device not found. Is the bike on / advertising?"))
-                    self.msgq.put(("status", ("Not found", "red")))
-                    self.msgq.put(("enable_connect", True))
+                    self._post(("log", "[BLE] Device not found. Is the bike on / advertising?"))
+                    self._post(("status", ("Not found", "red")))
                     return
-
-            self.msgq.put(("log", f"[BLE] Found {dev.name} ({dev.address}) — connecting…"))
+                self._post(("log", f"[BLE] Found {dev.name} ({dev.address}) — connecting…"))
 
             client: Optional[BleakClient] = None
             self._notify_on = False
@@ -374,60 +570,74 @@ class BikeKeyGUI:
             def _on_disc(_client):
                 loop.call_soon_threadsafe(disconnected_event.set)
 
+            # Bind per-frame state as closure locals (no global/attribute lookups in the handler)
+            last_p, last_r = self._last_seq_press, self._last_seq_release
+            records = self._buttons
+            log_put = self._post
+            button_ids = BUTTON_ID
+
             async def notification_handler(_char, data: bytearray):
-                payload = bytes(data)
-                evt = parse_short_frame(payload)
-                if not evt:
+                # Length gate first, then one int-keyed lookup; no per-frame allocations
+                idx = button_ids.get((data[0] << 8) | data[1]) if len(data) == 3 else None
+                if idx is None:
                     # Only show "other frames" when Debug output is checked
-                    if self.debug_var.get():
-                        self.msgq.put(("log", f"[BLE] Other frame: {payload.hex().upper()}"))
-                    return
-                if already_handled(evt["prefix"], evt["type"], evt["seq"]):
+                    if self._debug:
+                        log_put(("log", f"[BLE] Other frame: {data.hex().upper()}"))
                     return
 
-                name, ev_type, seq, rr = evt["name"], evt["type"], evt["seq"], evt["rrHex"]
-                self.msgq.put(("log", f"[BLE] {name} {ev_type} seq={seq} ({evt['prefix']}{rr})"))
-
-                # Resolve behavior and key
-                key_name = BUTTON_TO_KEY.get(name)
-                behavior = BUTTON_BEHAVIOR.get(name, "tap")
-
-                if ev_type == "press":
-                    if not key_name:
-                        return
-                    if behavior == "tap":
-                        send_key_tap(key_name)
-                    else:  # "hold"
-                        hold_if_needed(name, key_name)
-                else:  # release
-                    if behavior == "hold":
-                        release_if_held(name)
-                    # taps ignore release
+                r = data[2]
+                pressed = r & 0x80
+                seq = r & 0x7F
+                last = last_p if pressed else last_r
+                if last[idx] == seq:
+                    return  # already handled
+                last[idx] = seq
+
+                rec = records[idx]
+                if self._debug:
+                    ev_type = "press" if pressed else "release"
+                    log_put(("log", f"[BLE] {rec[REC_NAME]} {ev_type} seq={seq} ({_HEX[data[0]]}{_HEX[data[1]]}{_HEX[r]})"))
+
+                # Key + behavior were resolved at startup into per-button thunks
+                rec[REC_PRESS if pressed else REC_RELEASE]()
 
             try:
                 client = BleakClient(dev, disconnected_callback=_on_disc)
-                await client.connect()
+                try:
+                    if isinstance(dev, str):
+                        await client.connect(timeout=KNOWN_ADDR_CONNECT_TIMEOUT_S)
+                    else:
+                        await client.connect()
+                except (BleakError, asyncio.TimeoutError) as e:
+                    self._post(("log", f"[BLE] Connect error: {e}"))
                 self.client = client
 
                 if not client.is_connected:
-                    self.msgq.put(("log", "[BLE] Failed to connect."))
-                    self.msgq.put(("status", ("Error", "red")))
+                    self._post(("log", "[BLE] Failed to connect."))
+                    self._post(("status", ("Error", "red")))
                     # try to re-scan & reconnect unless user stopped
                     dev = None
+                    self._known_addr = None
                     if self.stop_event.is_set():
                         break
-                    await asyncio.sleep(RECONNECT_DELAY_S)
+                    attempt += 1
+                    await asyncio.wait({stop_wait}, timeout=reconnect_delay(attempt))
                     continue
 
-                self.msgq.put(("log", "[BLE] Connected. Subscribing to notifications…"))
+                self._known_addr = client.address
+                self._post(("log", "[BLE] Connected. Subscribing to notifications…"))
                 await client.start_notify(WAHOO_CHAR_UUID, notification_handler)
                 self._notify_on = True
+                attempt = 0
 
-                self.msgq.put(("status", ("Connected", "green")))
-                self.msgq.put(("log", "[BLE] Listening (short-frames only)."))
+                self._post(("status", ("Connected", "green")))
+                self._post(("log", "[BLE] Listening (short-frames only)."))
                 # Stay here until user clicks Disconnect or device disconnects
-                while not self.stop_event.is_set() and not disconnected_event.is_set():
-                    await asyncio.sleep(0.1)
+                disc_wait = asyncio.ensure_future(disconnected_event.wait())
+                try:
+                    await asyncio.wait({disc_wait, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    disc_wait.cancel()
 
             finally:
                 # Cleanup this connection attempt
@@ -436,51 +646,87 @@ class BikeKeyGUI:
                         if self._notify_on:
                             try:
                                 await client.stop_notify(WAHOO_CHAR_UUID)
-                                self.msgq.put(("log", "[BLE] Notifications stopped."))
+                                self._post(("log", "[BLE] Notifications stopped."))
                             except Exception as e:
-                                self.msgq.put(("log", f"[BLE] stop_notify error: {e}"))
+                                self._post(("log", f"[BLE] stop_notify error: {e}"))
                         if client.is_connected:
                             try:
                                 await client.disconnect()
-                                self.msgq.put(("log", "[BLE] Disconnected from device."))
+                                self._post(("log", "[BLE] Disconnected from device."))
                             except Exception as e:
-                                self.msgq.put(("log", f"[BLE] disconnect error: {e}"))
+                                self._post(("log", f"[BLE] disconnect error: {e}"))
                 finally:
                     self.client = None
                     self._notify_on = False
                     # Always release any held keys when link drops
-                    release_all_held_keys()
+                    release_all_held_keys(self._held)
 
             # Decide whether to reconnect or exit
             if self.stop_event.is_set():
-                self.msgq.put(("status", ("Disconnected", "gray")))
-                self.msgq.put(("enable_connect", True))
+                self._post(("status", ("Disconnected", "gray")))
                 break  # user asked to stop
 
             # Device disconnected unexpectedly -> try to reconnect
-            self.msgq.put(("status", ("Reconnecting…", "orange")))
-            self.msgq.put(("log", f"[BLE] Will retry in {RECONNECT_DELAY_S:.1f}s…"))
-            await asyncio.sleep(RECONNECT_DELAY_S)
+            attempt += 1
+            delay = reconnect_delay(attempt)
+            self._post(("status", ("Reconnecting…", "orange")))
+            self._post(("log", f"[BLE] Will retry in {delay:.1f}s…"))
+            # Backoff can be long; Disconnect cuts it short
+            await asyncio.wait({stop_wait}, timeout=delay)
             # Keep 'dev' as-is; if that fails next time, loop will re-scan by setting dev=None
 
     # ---------- UI queue pump ----------
+    def _post(self, item):
+        """Queue a (kind, payload) message from the BLE thread; _drain_queue picks it up."""
+        if item[0] == "log":
+            # Backlog may read slightly high while a drain is in progress; that only drops earlier
+            if self._logs_posted - self._logs_drained >= MSGQ_MAX:
+                self._logs_dropped += 1
+                return
+            self._logs_posted += 1
+        self.msgq.append(item)
+
     def _drain_queue(self):
-        try:
-            while True:
-                kind, payload = self.msgq.get_nowait()
-                if kind == "log":
-                    self.append_log(payload)
-                elif kind == "status":
-                    text, color = payload
-                    self.set_status(text, color)
-                elif kind == "enable_connect":
-                    self.btn_connect.config(state="normal" if payload else "disabled")
-                    # Disconnect stays enabled so user can click again; it just sets stop_event
-                    self.btn_disconnect.config(state="normal")
-        except queue.Empty:
-            pass
-        # poll again
-        self.root.after(80, self._drain_queue)
+        # Drain everything pending, then touch Tk once per kind (only the latest status matters)
+        logs, statuses, enables = [], [], []
+        dropped_total = self._logs_dropped
+        dropped = dropped_total - self._logs_dropped_seen
+        if dropped:
+            self._logs_dropped_seen = dropped_total
+            logs.append(f"[UI] … {dropped} log lines dropped (GUI fell behind)")
+        n_logs = len(logs)
+        popleft = self.msgq.popleft
+        while True:
+            try:
+                kind, payload = popleft()
+            except IndexError:
+                break
+            if kind == "log":
+                logs.append(payload)
+            elif kind == "status":
+                statuses.append(payload)
+            elif kind == "enable_connect":
+                enables.append(payload)
+        self._logs_drained += len(logs) - n_logs
+        if logs:
+            self.log.configure(state="normal")
+            self.log.insert("end", "\n".join(logs) + "\n")
+            self.log.delete("1.0", f"end-{LOG_MAX_LINES + 1}l")  # bound widget growth
+            self.log.see("end")
+            self.log.configure(state="disabled")
+        if statuses:
+            text, color = statuses[-1]
+            self.set_status(text, color)
+        if enables:
+            self.btn_connect.config(state="normal" if enables[-1] else "disabled")
+            # Disconnect stays enabled so user can click again; it just requests a stop
+            self.btn_disconnect.config(state="normal")
+        # Poll again: quickly while busy, backing off while idle
+        if logs or statuses or enables:
+            self._drain_delay_ms = DRAIN_BUSY_MS
+        else:
+            self._drain_delay_ms = min(self._drain_delay_ms * 2, DRAIN_IDLE_MAX_MS)
+        self.root.after(self._drain_delay_ms, self._drain_queue)
 
     # ---------- Main loop ----------
     def run(self):